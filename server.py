@@ -1,14 +1,122 @@
 #!/usr/bin/env python3
+import asyncio
 import socket
+import struct
 import threading
-import json
+import time
 import sys
 import os
 import traceback
-from typing import List
+
+try:
+    import orjson
+
+    def dumps_line(obj) -> bytes:
+        """Serialize obj to a newline-terminated JSON line."""
+        return orjson.dumps(obj) + b"\n"
+
+    loads = orjson.loads
+except ImportError:
+    # orjson wheel not available (e.g. unsupported platform); stdlib fallback
+    import json
+
+    def dumps_line(obj) -> bytes:
+        """Serialize obj to a newline-terminated JSON line."""
+        return (json.dumps(obj, separators=(",", ":")) + "\n").encode()
+
+    loads = json.loads
+
+try:
+    # Optional: only needed for the io_uring backend (USE_IOURING=1)
+    import liburing
+except ImportError:
+    liburing = None
+
+
+def cell_index(z, y, x) -> int:
+    """Flat index of board cell (z, y, x); also its bit in a bitboard."""
+    return z * 16 + y * 4 + x
+
+
+def _build_lines():
+    """Enumerate all 76 winning lines as tuples of flat cell indices
+       (z*16 + y*4 + x)."""
+    lines = []
+
+    # rows (x) for each z,y
+    for z in range(4):
+        for y in range(4):
+            lines.append([(z, y, x) for x in range(4)])
+    # columns (y) for each z,x
+    for z in range(4):
+        for x in range(4):
+            lines.append([(z, y, x) for y in range(4)])
+    # vertical (z) for each y,x
+    for y in range(4):
+        for x in range(4):
+            lines.append([(z, y, x) for z in range(4)])
+    # face diagonals per layer (z fixed)
+    for z in range(4):
+        lines.append([(z, i, i) for i in range(4)])
+        lines.append([(z, i, 3 - i) for i in range(4)])
+    # vertical face diagonals x fixed
+    for x in range(4):
+        lines.append([(i, i, x) for i in range(4)])
+        lines.append([(i, 3 - i, x) for i in range(4)])
+    # vertical face diagonals y fixed
+    for y in range(4):
+        lines.append([(i, y, i) for i in range(4)])
+        lines.append([(i, y, 3 - i) for i in range(4)])
+    # 4 main space diagonals
+    lines.append([(i, i, i) for i in range(4)])
+    lines.append([(i, i, 3 - i) for i in range(4)])
+    lines.append([(i, 3 - i, i) for i in range(4)])
+    lines.append([(3 - i, i, i) for i in range(4)])
+
+    return tuple(tuple(cell_index(z, y, x) for (z, y, x) in line) for line in lines)
+
+
+def _build_lines_through(lines):
+    """For every cell, the bitmasks (bit z*16 + y*4 + x) of the winning
+       lines passing through it. A win can only complete on a line that
+       contains the cell just played, at most 7 per cell."""
+    masks = [sum(1 << cell for cell in line) for line in lines]
+    return tuple(tuple(m for m in masks if m >> cell & 1) for cell in range(64))
+
+
+def _build_board_template():
+    """Serialize the empty board as the nested 4x4x4 (z,y,x) JSON array
+       clients expect, giving every cell a fixed 2-byte field (" 0",
+       "-1" or " 1"). Returns the bytes and each cell's field offset, so
+       a move patches the JSON in place instead of re-serializing."""
+    out = bytearray(b"[")
+    offsets = []
+    for z in range(4):
+        out += b"[" if z == 0 else b",["
+        for y in range(4):
+            out += b"[" if y == 0 else b",["
+            for x in range(4):
+                if x:
+                    out += b","
+                offsets.append(len(out))
+                out += b" 0"
+            out += b"]"
+        out += b"]"
+    out += b"]"
+    return bytes(out), tuple(offsets)
+
 
 class TicTacToe3DServer:
-    def __init__(self, host='0.0.0.0', port=None, max_players=2):
+    # Static properties of the 4x4x4 board; built once at import time
+    WINNING_LINES = _build_lines()
+    LINES_THROUGH = _build_lines_through(WINNING_LINES)
+    BOARD_TEMPLATE, CELL_OFFSETS = _build_board_template()
+
+    # flat_board cell value -> its JSON field (0 empty, -1 X, 1 O)
+    CELL_JSON = (b" 0", b"-1", b" 1")
+
+    def __init__(self, host='0.0.0.0', port=None, max_players=2, accept_listeners=1,
+                 pin_threads=False):
         # Render provides PORT environment variable
         if port is None:
             port = int(os.environ.get('PORT', 5555))
@@ -16,62 +124,180 @@ class TicTacToe3DServer:
         self.host = host
         self.port = port
         self.max_players = max_players
+        # Number of SO_REUSEPORT listeners (each with its own accept thread)
+        # the threaded server runs; 0 means one per CPU
+        self.accept_listeners = accept_listeners or os.cpu_count() or 1
+        # Optionally pin accept/client threads to fixed CPUs (Linux only) so
+        # a connection's work stays on one core's caches
+        self.pin_threads = pin_threads and hasattr(os, "sched_setaffinity")
+        self.cpus = sorted(os.sched_getaffinity(0)) if self.pin_threads else []
 
-        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-
-        try:
-            self.server.bind((host, port))
-        except OSError as e:
-            print(f"Failed to bind to port {port}: {e}", flush=True)
-            print(f"Available ports from Render: {os.environ.get('PORT', 'Not set')}", flush=True)
-            raise
-
-        self.server.listen(4)
+        self.server = self._make_listener()
+        self.listeners = [self.server]
         print(f"Server listening on {host}:{port}", flush=True)
 
         # Game state
-        # Board as 4x4x4 list (z,y,x). 0 empty, -1 player 0 (X), 1 player 1 (O)
-        self.board = [[[0 for _ in range(4)] for _ in range(4)] for _ in range(4)]
+        # Board as flat 64 cells indexed z*16 + y*4 + x.
+        # 0 empty, 1 player 0 (X), 2 player 1 (O)
+        self.flat_board = bytearray(64)
+        # JSON for the board as sent to clients, patched one cell per move
+        self._board_json = bytearray(self.BOARD_TEMPLATE)
+        # Serialized state line, reused until the game state changes
+        self._state_dirty = True
+        self._state_cache = b""
+        # Per-player occupancy bitboards (bit z*16 + y*4 + x) for win checks
+        self.p0_bits = 0
+        self.p1_bits = 0
         self.current_player = 0  # 0 or 1
         self.winner = None  # None or 0/1
         self.last_move = None  # dict with player,z,y,x
 
         # Clients: list of dicts {sock,addr,player_id,thread}
         self.clients = []
+        # Bit i set while player id i is free
+        self._free_mask = (1 << max_players) - 1
         self.lock = threading.Lock()
+        # Threaded server: state lines queued for the sender thread, which
+        # sends everything queued since its last wakeup in one go per client
+        self._pending_broadcasts = []
+        self._broadcast_event = threading.Event()
         self.running = True
+        self._shutdown_event = threading.Event()
+
+    def _make_listener(self):
+        """Create a listening socket bound to (host, port). With more than
+           one accept listener, SO_REUSEPORT is set where available so they
+           can share the port and the kernel spreads incoming connections
+           across their queues."""
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.accept_listeners > 1 and hasattr(socket, "SO_REUSEPORT"):
+            try:
+                listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            except OSError:
+                pass
+
+        try:
+            listener.bind((self.host, self.port))
+        except OSError as e:
+            print(f"Failed to bind to port {self.port}: {e}", flush=True)
+            print(f"Available ports from Render: {os.environ.get('PORT', 'Not set')}", flush=True)
+            listener.close()
+            raise
+
+        listener.listen(4)
+        return listener
 
     def run(self):
         """Main accept loop. This is what your script expected to exist."""
         try:
-            accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
-            accept_thread.start()
+            # Extra listeners need SO_REUSEPORT to share the port
+            if hasattr(socket, "SO_REUSEPORT"):
+                for _ in range(self.accept_listeners - 1):
+                    try:
+                        self.listeners.append(self._make_listener())
+                    except OSError:
+                        break
 
-            # Keep main thread alive; this process is run as a background worker
-            while self.running:
-                # Keep a small sleep to avoid busy-loop
-                try:
-                    threading.Event().wait(1.0)
-                except KeyboardInterrupt:
-                    break
+            sender_thread = threading.Thread(target=self._sender_loop, daemon=True)
+            sender_thread.start()
+
+            for i, listener in enumerate(self.listeners):
+                accept_thread = threading.Thread(target=self._accept_loop, args=(listener, i), daemon=True)
+                accept_thread.start()
+
+            # Keep main thread alive until shutdown() is called from any
+            # thread; this process is run as a background worker
+            try:
+                self._shutdown_event.wait()
+            except KeyboardInterrupt:
+                pass
         finally:
             self.shutdown()
 
-    def _accept_loop(self):
+    # Kernel socket buffer size requested for client sockets. The kernel
+    # clamps SO_SNDBUF/SO_RCVBUF to net.core.wmem_max/net.core.rmem_max, so
+    # raise those sysctls on the host for the full size to take effect.
+    CLIENT_SOCKET_BUFFER = 1 << 20
+
+    # A send that makes no progress for this many seconds fails, so a peer
+    # that stopped reading is dropped instead of stalling every broadcast.
+    # The threaded server sets it as SO_SNDTIMEO and shuts the socket down
+    # so the blocked readline returns and frees the player id; the asyncio
+    # server bounds each drain and aborts the transport; the io_uring server
+    # drops a client whose send has been pending this long. Reads keep
+    # blocking.
+    SEND_TIMEOUT = 5.0
+
+    @classmethod
+    def _set_send_timeout(cls, sock):
+        if not (sys.platform.startswith("linux") and hasattr(socket, "SO_SNDTIMEO")):
+            return
+        sec = int(cls.SEND_TIMEOUT)
+        usec = int((cls.SEND_TIMEOUT - sec) * 1_000_000)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDTIMEO, struct.pack("ll", sec, usec))
+        except OSError as e:
+            print(f"Failed to set send timeout: {e}", flush=True)
+
+    @classmethod
+    def _tune_client_socket(cls, sock):
+        """Tune an accepted socket for small, latency-sensitive JSON lines:
+           disable Nagle so each broadcast is flushed immediately and enlarge
+           the kernel buffers."""
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, cls.CLIENT_SOCKET_BUFFER)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, cls.CLIENT_SOCKET_BUFFER)
+        except OSError as e:
+            print(f"Failed to tune client socket: {e}", flush=True)
+
+    def _pin_thread(self, slot):
+        """Pin the calling thread to the CPU for slot and return that CPU.
+           Returns None if pinning is disabled or fails."""
+        if not self.pin_threads:
+            return None
+        return self._pin_to_cpu(self.cpus[slot % len(self.cpus)])
+
+    def _pin_to_cpu(self, cpu):
+        """Pin the calling thread to cpu and return it, or None on failure."""
+        if cpu is None:
+            return None
+        try:
+            # pid 0 is the calling thread
+            os.sched_setaffinity(0, {cpu})
+        except OSError as e:
+            print(f"Failed to pin thread to CPU {cpu}: {e}", flush=True)
+            return None
+        return cpu
+
+    def _accept_loop(self, listener, slot=0):
+        cpu = self._pin_thread(slot)
+        if cpu is not None and hasattr(socket, "SO_INCOMING_CPU"):
+            # Within a SO_REUSEPORT group the kernel hands a SYN that arrived
+            # on cpu to this listener, so this pinned accept thread gets the
+            # connections whose packets land on its core. With the default
+            # ACCEPT_LISTENERS=1 there is no group to steer within and the
+            # option has no effect.
+            try:
+                listener.setsockopt(socket.SOL_SOCKET, socket.SO_INCOMING_CPU, cpu)
+            except OSError as e:
+                print(f"Failed to set SO_INCOMING_CPU on listener: {e}", flush=True)
         print("Accept loop started", flush=True)
         while self.running:
             try:
-                client_sock, client_addr = self.server.accept()
+                client_sock, client_addr = listener.accept()
             except OSError:
                 break
+            self._tune_client_socket(client_sock)
+            self._set_send_timeout(client_sock)
             print(f"New connection from {client_addr}", flush=True)
             with self.lock:
-                if len(self.clients) >= self.max_players:
+                if not self._free_mask:
                     # refuse extra clients politely
                     try:
-                        client_sock.sendall((json.dumps({"type": "error", "message": "Server full"}) + "\n").encode())
-                    except Exception:
+                        client_sock.sendall(dumps_line({"type": "error", "message": "Server full"}))
+                    except OSError:
                         pass
                     client_sock.close()
                     print(f"Refused connection from {client_addr}: server full", flush=True)
@@ -82,60 +308,65 @@ class TicTacToe3DServer:
                     "sock": client_sock,
                     "addr": client_addr,
                     "player_id": player_id,
+                    # CPU of the accepting thread, so the client thread runs
+                    # where this connection's packets are processed
+                    "cpu": cpu,
                     "thread": None,
                     "alive": True,
                 }
+                # The client thread adds itself to self.clients once its init
+                # message is out, so no state line can reach it before init
                 t = threading.Thread(target=self._client_thread, args=(client_info,), daemon=True)
                 client_info["thread"] = t
-                self.clients.append(client_info)
                 t.start()
 
     def _next_player_id(self):
-        used = {c["player_id"] for c in self.clients if c.get("alive")}
-        for pid in range(self.max_players):
-            if pid not in used:
-                return pid
-        # fallback (shouldn't reach)
-        return len(used)
+        """Claim the lowest free player id. Callers check _free_mask first;
+           the threaded server calls this with self.lock held."""
+        free = self._free_mask
+        pid = (free & -free).bit_length() - 1
+        self._free_mask = free & ~(1 << pid)
+        return pid
+
+    def _release_player_id(self, pid):
+        """Return pid to the free set once its client is gone."""
+        self._free_mask |= 1 << pid
 
     def _client_thread(self, client_info):
         sock = client_info["sock"]
         pid = client_info["player_id"]
         addr = client_info["addr"]
+        self._pin_to_cpu(client_info["cpu"])
         print(f"Starting client thread for player {pid} from {addr}", flush=True)
 
         # Send init message with assigned player id
         try:
-            sock.sendall((json.dumps({"type": "init", "player_id": pid}) + "\n").encode())
-        except Exception:
+            sock.sendall(dumps_line({"type": "init", "player_id": pid}))
+        except OSError:
             pass
+        with self.lock:
+            self.clients.append(client_info)
 
         # Send initial state
         self._broadcast_state()
 
-        buffer = ""
+        # Buffered binary reader: newline framing happens in the C-level
+        # readline; the parser accepts bytes, so no decode step
+        rfile = sock.makefile("rb")
         try:
             while client_info["alive"]:
-                data = sock.recv(4096)
-                if not data:
+                line = rfile.readline()
+                if not line:
                     break
+                line = line.strip()
+                if not line:
+                    continue
                 try:
-                    buffer += data.decode()
-                except UnicodeDecodeError:
-                    # ignore undecodable fragments
+                    message = loads(line)
+                except Exception as e:
+                    print(f"Malformed JSON from {addr}: {e}", flush=True)
                     continue
-
-                while "\n" in buffer:
-                    line, buffer = buffer.split("\n", 1)
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        message = json.loads(line)
-                    except Exception as e:
-                        print(f"Malformed JSON from {addr}: {e}", flush=True)
-                        continue
-                    self._handle_message(client_info, message)
+                self._handle_message(client_info, message)
         except Exception as e:
             print(f"Client thread exception for {addr}: {e}", flush=True)
             traceback.print_exc()
@@ -143,17 +374,33 @@ class TicTacToe3DServer:
             print(f"Client {addr} disconnected (player {pid})", flush=True)
             client_info["alive"] = False
             try:
+                rfile.close()
                 sock.close()
             except Exception:
                 pass
             with self.lock:
                 # Remove from clients list
                 self.clients = [c for c in self.clients if c is not client_info]
+                self._release_player_id(pid)
             # If a player left mid-game, we can optionally reset the board
             # For now, we broadcast updated state to remaining clients
             self._broadcast_state()
 
     def _handle_message(self, client_info, message):
+        move = self._parse_move(message)
+        if move is None:
+            return
+        with self.lock:
+            applied = self._apply_move(client_info["player_id"], *move)
+        if applied:
+            # Broadcast updated state (takes the lock itself)
+            self._broadcast_state()
+
+    def _parse_move(self, message):
+        """Return (z, y, x) for a well-formed move message, else None."""
+        if not isinstance(message, dict):
+            # Valid JSON but not an object (e.g. a list); ignore it
+            return None
         mtype = message.get("type")
         if mtype == "move":
             # Validate move structure
@@ -162,120 +409,145 @@ class TicTacToe3DServer:
                 y = int(message.get("y"))
                 x = int(message.get("x"))
             except Exception:
-                return
-            player = client_info["player_id"]
-            with self.lock:
-                if self.winner is not None:
-                    # Game already finished; ignore moves
-                    return
-                if player != self.current_player:
-                    # Not this player's turn
-                    print(f"Ignoring move from player {player}: not their turn", flush=True)
-                    return
-                if not (0 <= z < 4 and 0 <= y < 4 and 0 <= x < 4):
-                    print(f"Ignoring out-of-bounds move from {player}: {(z,y,x)}", flush=True)
-                    return
-                if self.board[z][y][x] != 0:
-                    print(f"Ignoring illegal move from {player}: cell occupied {(z,y,x)}", flush=True)
-                    return
-
-                # Apply move
-                self.board[z][y][x] = -1 if player == 0 else 1
-                self.last_move = {"player": player, "z": z, "y": y, "x": x}
-                # Check for winner after move
-                winner = self._check_winner()
-                if winner is not None:
-                    self.winner = winner
-                else:
-                    # toggle turn
-                    self.current_player = 1 - self.current_player
-
-                # Broadcast updated state
-                self._broadcast_state()
+                return None
+            return z, y, x
+        # Unknown message types are ignored for now
+        return None
+
+    def _apply_move(self, player, z, y, x):
+        """Validate and apply a move to the game state. Returns True if the
+           state changed. The threaded server calls this with self.lock held."""
+        if self.winner is not None:
+            # Game already finished; ignore moves
+            return False
+        if player != self.current_player:
+            # Not this player's turn
+            print(f"Ignoring move from player {player}: not their turn", flush=True)
+            return False
+        if not (0 <= z < 4 and 0 <= y < 4 and 0 <= x < 4):
+            print(f"Ignoring out-of-bounds move from {player}: {(z,y,x)}", flush=True)
+            return False
+        cell = cell_index(z, y, x)
+        if self.flat_board[cell] != 0:
+            print(f"Ignoring illegal move from {player}: cell occupied {(z,y,x)}", flush=True)
+            return False
+
+        # Apply move
+        self.flat_board[cell] = 1 if player == 0 else 2
+        offset = self.CELL_OFFSETS[cell]
+        self._board_json[offset:offset + 2] = self.CELL_JSON[self.flat_board[cell]]
+        if player == 0:
+            self.p0_bits |= 1 << cell
         else:
-            # Unknown message types are ignored for now
-            pass
+            self.p1_bits |= 1 << cell
+        self.last_move = {"player": player, "z": z, "y": y, "x": x}
+        # Check for winner after move
+        winner = self._check_winner(player, cell)
+        if winner is not None:
+            self.winner = winner
+        else:
+            # toggle turn
+            self.current_player = 1 - self.current_player
+        self._state_dirty = True
+        return True
+
+    def _state_bytes(self):
+        """Return the serialized state line, rebuilding it only if the game
+           state changed since the last call. The threaded server calls this
+           with self.lock held."""
+        if self._state_dirty:
+            # Only the small scalar fields go through the serializer; the
+            # board JSON is spliced in from the patched template
+            tail = dumps_line({
+                "current_player": self.current_player,
+                "winner": self.winner,
+                "last_move": self.last_move,
+            })
+            self._state_cache = b"".join((
+                b'{"type":"state","board":', self._board_json, b",", memoryview(tail)[1:],
+            ))
+            self._state_dirty = False
+        return self._state_cache
+
+    # How long the sender thread waits after a wakeup for more broadcasts to
+    # coalesce into the same send
+    COALESCE_WINDOW = 0.002
 
     def _broadcast_state(self):
-        state = {
-            "type": "state",
-            "board": self.board,
-            "current_player": self.current_player,
-            "winner": self.winner,
-            "last_move": self.last_move,
-        }
-        data = (json.dumps(state) + "\n").encode()
-        dead = []
         with self.lock:
-            for c in list(self.clients):
+            data = self._state_bytes()
+            pending = self._pending_broadcasts
+            # The cached line is reused while the state is unchanged; one
+            # copy in a batch is enough
+            if not pending or pending[-1] is not data:
+                pending.append(data)
+        self._broadcast_event.set()
+
+    def _sender_loop(self):
+        """Send queued state lines to all clients. Broadcasts queued while
+           a send is in progress, or within COALESCE_WINDOW of a wakeup, go
+           out as one buffer per client; clients frame on newlines, so
+           several lines in one segment parse as before."""
+        while self.running:
+            self._broadcast_event.wait()
+            # Doubles as an early exit when shutdown() is called
+            self._shutdown_event.wait(self.COALESCE_WINDOW)
+            with self.lock:
+                self._broadcast_event.clear()
+                batch = self._pending_broadcasts
+                self._pending_broadcasts = []
+                targets = [c for c in self.clients if c.get("alive") and c.get("sock")]
+            if not batch:
+                continue
+
+            view = memoryview(batch[0] if len(batch) == 1 else b"".join(batch))
+            dead = []
+            for c in targets:
                 try:
-                    if c.get("alive") and c.get("sock"):
-                        c["sock"].sendall(data)
-                except Exception:
-                    # mark for removal
+                    self._send_view(c["sock"], view)
+                except OSError:
+                    # mark for removal and wake the client thread's readline
                     c["alive"] = False
                     dead.append(c)
+                    try:
+                        c["sock"].shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+
             if dead:
-                self.clients = [c for c in self.clients if c.get("alive")]
-
-    def _check_winner(self):
-        """Check for a 4-in-a-row winner. Returns 0 or 1 if found, else None.
-           This is a brute-force check over all lines (reasonable for 4x4x4)."""
-        # Convert -1/1 to player indices 0/1 mapping for easy comparison
-        def val_to_player(v):
-            if v == -1:
-                return 0
-            if v == 1:
-                return 1
-            return None
+                with self.lock:
+                    self.clients = [c for c in self.clients if c.get("alive")]
 
-        lines = []
+    @staticmethod
+    def _send_view(sock, view):
+        """Send the whole of view, using sendmsg where the platform has it."""
+        if not hasattr(sock, "sendmsg"):
+            sock.sendall(view)
+            return
+        sent = sock.sendmsg([view])
+        while sent < len(view):
+            sent += sock.sendmsg([view[sent:]])
 
-        # rows (x) for each z,y
-        for z in range(4):
-            for y in range(4):
-                lines.append([(z, y, x) for x in range(4)])
-        # columns (y) for each z,x
-        for z in range(4):
-            for x in range(4):
-                lines.append([(z, y, x) for y in range(4)])
-        # vertical (z) for each y,x
-        for y in range(4):
-            for x in range(4):
-                lines.append([(z, y, x) for z in range(4)])
-        # face diagonals per layer (z fixed)
-        for z in range(4):
-            lines.append([(z, i, i) for i in range(4)])
-            lines.append([(z, i, 3 - i) for i in range(4)])
-        # vertical face diagonals x fixed
-        for x in range(4):
-            lines.append([(i, i, x) for i in range(4)])
-            lines.append([(i, 3 - i, x) for i in range(4)])
-        # vertical face diagonals y fixed
-        for y in range(4):
-            lines.append([(i, y, i) for i in range(4)])
-            lines.append([(i, y, 3 - i) for i in range(4)])
-        # 4 main space diagonals
-        lines.append([(i, i, i) for i in range(4)])
-        lines.append([(i, i, 3 - i) for i in range(4)])
-        lines.append([(i, 3 - i, i) for i in range(4)])
-        lines.append([(3 - i, i, i) for i in range(4)])
-
-        for line in lines:
-            vals = [self.board[z][y][x] for (z, y, x) in line]
-            if all(v == -1 for v in vals):
-                return 0
-            if all(v == 1 for v in vals):
-                return 1
+    def _check_winner(self, player, cell):
+        """Check whether player's move on cell completed a 4-in-a-row.
+           Returns player if so, else None. Only the lines through cell are
+           tested, each with a single mask comparison on the bitboard."""
+        bits = self.p0_bits if player == 0 else self.p1_bits
+        for mask in self.LINES_THROUGH[cell]:
+            if (bits & mask) == mask:
+                return player
         return None
 
     def shutdown(self):
         print("Shutting down server...", flush=True)
         self.running = False
-        try:
-            self.server.close()
-        except Exception:
-            pass
+        self._shutdown_event.set()
+        self._broadcast_event.set()
+        for listener in self.listeners:
+            try:
+                listener.close()
+            except Exception:
+                pass
         with self.lock:
             for c in list(self.clients):
                 try:
@@ -286,6 +558,395 @@ class TicTacToe3DServer:
                     pass
             self.clients = []
 
+
+class AsyncTicTacToe3DServer(TicTacToe3DServer):
+    """Single-threaded asyncio variant of the server. All connections and
+       state transitions run on one event loop, so no locking is needed.
+       Clients are dicts {writer,addr,player_id,alive}."""
+
+    def run(self):
+        try:
+            asyncio.run(self._serve())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    async def _serve(self):
+        server = await asyncio.start_server(self._handle_client, sock=self.server)
+        print("Async accept loop started", flush=True)
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_client(self, reader, writer):
+        addr = writer.get_extra_info("peername")
+        print(f"New connection from {addr}", flush=True)
+        # asyncio already disables Nagle on TCP; this also sizes the buffers
+        self._tune_client_socket(writer.get_extra_info("socket"))
+        if not self._free_mask:
+            # refuse extra clients politely
+            writer.write(dumps_line({"type": "error", "message": "Server full"}))
+            try:
+                await writer.drain()
+            except OSError:
+                pass
+            writer.close()
+            print(f"Refused connection from {addr}: server full", flush=True)
+            return
+
+        pid = self._next_player_id()
+        client_info = {
+            "writer": writer,
+            "addr": addr,
+            "player_id": pid,
+            "alive": True,
+            "draining": False,
+        }
+        self.clients.append(client_info)
+        print(f"Starting client handler for player {pid} from {addr}", flush=True)
+
+        try:
+            # Send init message with assigned player id, then the current
+            # state; inside the try so a failure here still frees the seat
+            writer.write(dumps_line({"type": "init", "player_id": pid}))
+            await self._broadcast_state_async()
+
+            while client_info["alive"]:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError:
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    message = loads(line)
+                except Exception as e:
+                    print(f"Malformed JSON from {addr}: {e}", flush=True)
+                    continue
+                move = self._parse_move(message)
+                if move is not None and self._apply_move(pid, *move):
+                    await self._broadcast_state_async()
+        except Exception as e:
+            print(f"Client handler exception for {addr}: {e}", flush=True)
+            traceback.print_exc()
+        finally:
+            print(f"Client {addr} disconnected (player {pid})", flush=True)
+            client_info["alive"] = False
+            writer.close()
+            self.clients = [c for c in self.clients if c is not client_info]
+            self._release_player_id(pid)
+            await self._broadcast_state_async()
+
+    async def _broadcast_state_async(self):
+        data = self._state_bytes()
+        targets = [c for c in self.clients if c["alive"]]
+        for c in targets:
+            c["writer"].write(data)
+        for c in targets:
+            if c["draining"]:
+                # Another broadcast is already draining this writer and will
+                # flush this line too; a second concurrent drain() trips an
+                # assertion in StreamWriter on Python 3.8/3.9
+                continue
+            c["draining"] = True
+            try:
+                await asyncio.wait_for(c["writer"].drain(), self.SEND_TIMEOUT)
+            except (asyncio.TimeoutError, OSError):
+                # close() would wait for the stalled buffer to flush; abort
+                # drops it and ends the handler's read, freeing the player id
+                c["alive"] = False
+                c["writer"].transport.abort()
+            finally:
+                c["draining"] = False
+        self.clients = [c for c in self.clients if c["alive"]]
+
+
+class IoUringTicTacToe3DServer(TicTacToe3DServer):
+    """Linux io_uring variant of the server (requires the liburing package).
+       One thread drives a single ring set up with SINGLE_ISSUER and
+       DEFER_TASKRUN: a multishot accept on the listener, one fixed-buffer
+       read per client and a queue of sends per client, all addressed
+       through registered file slots. Like the asyncio server it needs no
+       locks. Clients are dicts
+       {sock,addr,player_id,alive,conn_id,inbuf,outq,sending,send_since,inflight}."""
+
+    RING_ENTRIES = 256
+    RECV_SIZE = 4096
+    # A client whose queued sends pass this many bytes is dropped, like one
+    # whose head send has made no progress for SEND_TIMEOUT
+    OUTQ_LIMIT = 1 << 16
+
+    # Low two bits of an SQE's user_data select the operation; the rest is
+    # the connection id, so completions for a closed connection are dropped
+    OP_ACCEPT = 0
+    OP_RECV = 1
+    OP_SEND = 2
+
+    @classmethod
+    def _setup_ring(cls, ring, recv_bufs):
+        """Initialize ring with the flags this server relies on and register
+           one file slot and one fixed receive buffer per player id (a
+           client's slot is its player_id). Returns the registered Iovec,
+           which must stay referenced while the ring is in use. Raises
+           OSError if the kernel refuses any step."""
+        liburing.io_uring_queue_init(
+            cls.RING_ENTRIES, ring,
+            liburing.IORING_SETUP_SINGLE_ISSUER | liburing.IORING_SETUP_DEFER_TASKRUN,
+        )
+        try:
+            liburing.io_uring_register_files(ring, liburing.FileIndex([-1] * len(recv_bufs)))
+            recv_iov = liburing.Iovec(recv_bufs)
+            liburing.io_uring_register_buffers(ring, recv_iov)
+        except OSError:
+            liburing.io_uring_queue_exit(ring)
+            raise
+        return recv_iov
+
+    @classmethod
+    def probe(cls, max_players=2):
+        """Check that this host can run the server on a throwaway ring.
+           Returns None if so, else the OSError explaining why not, e.g. a
+           kernel older than 6.1 (no SINGLE_ISSUER/DEFER_TASKRUN) or io_uring
+           blocked by seccomp in a container."""
+        ring = liburing.Ring()
+        try:
+            cls._setup_ring(ring, [bytearray(cls.RECV_SIZE) for _ in range(max_players)])
+        except OSError as e:
+            return e
+        liburing.io_uring_queue_exit(ring)
+        return None
+
+    def run(self):
+        self.ring = liburing.Ring()
+        self.cqe = liburing.Cqe()
+        self.recv_bufs = [bytearray(self.RECV_SIZE) for _ in range(self.max_players)]
+        self.recv_iov = self._setup_ring(self.ring, self.recv_bufs)
+        try:
+            self._conns = {}  # conn_id -> client_info, until its last op completes
+            self._next_conn_id = 1
+            self._arm_accept()
+            print("io_uring accept loop started", flush=True)
+            self._event_loop()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+            liburing.io_uring_queue_exit(self.ring)
+
+    def _event_loop(self):
+        ring = self.ring
+        cqe = self.cqe
+        while self.running:
+            liburing.io_uring_submit_and_wait(ring, 1)
+            seen = 0
+            for _ in liburing.CqeIter(ring, cqe):
+                entry = cqe[0]
+                seen += 1
+                try:
+                    res = entry.res
+                except OSError as e:
+                    # liburing raises for negative results; keep the -errno
+                    res = -e.errno
+                self._dispatch(entry.user_data, res, entry.flags)
+            liburing.io_uring_cq_advance(ring, seen)
+
+    def _get_sqe(self):
+        sqe = liburing.io_uring_get_sqe(self.ring)
+        if sqe is None:
+            # Submission queue full; flush it and retry
+            liburing.io_uring_submit(self.ring)
+            sqe = liburing.io_uring_get_sqe(self.ring)
+        return sqe
+
+    def _arm_accept(self):
+        sqe = self._get_sqe()
+        # accept4 flags: accepted fds are close-on-exec from the start, as
+        # socket.accept() gives. They stay blocking: io_uring never blocks on
+        # them, and the refusal path uses a plain sendall
+        liburing.io_uring_prep_multishot_accept(sqe, self.server.fileno(), flags=socket.SOCK_CLOEXEC)
+        sqe.user_data = self.OP_ACCEPT
+
+    def _arm_recv(self, c):
+        slot = c["player_id"]
+        sqe = self._get_sqe()
+        liburing.io_uring_prep_read_fixed(sqe, slot, self.recv_bufs[slot], slot)
+        sqe.flags |= liburing.IOSQE_FIXED_FILE
+        sqe.user_data = c["conn_id"] << 2 | self.OP_RECV
+        c["inflight"] += 1
+
+    def _arm_send(self, c):
+        sqe = self._get_sqe()
+        liburing.io_uring_prep_send(sqe, c["player_id"], c["outq"][0])
+        sqe.flags |= liburing.IOSQE_FIXED_FILE
+        sqe.user_data = c["conn_id"] << 2 | self.OP_SEND
+        c["sending"] = True
+        c["send_since"] = time.monotonic()
+        c["inflight"] += 1
+
+    def _dispatch(self, user_data, res, flags):
+        op = user_data & 3
+        if op == self.OP_ACCEPT:
+            if res >= 0:
+                self._on_accept(res)
+            else:
+                print(f"Accept failed: {os.strerror(-res)}", flush=True)
+            if not flags & liburing.IORING_CQE_F_MORE and self.running:
+                # The kernel ended the multishot accept; re-arm it
+                self._arm_accept()
+            return
+
+        c = self._conns.get(user_data >> 2)
+        if c is None:
+            return
+        c["inflight"] -= 1
+        if not c["alive"]:
+            # Connection already dropped; forget it once nothing references
+            # its buffers any more
+            if c["inflight"] == 0:
+                del self._conns[c["conn_id"]]
+            return
+        try:
+            if op == self.OP_RECV:
+                self._on_recv(c, res)
+            elif op == self.OP_SEND:
+                self._on_send(c, res)
+        except Exception as e:
+            # Only the offending client is dropped; the ring keeps serving
+            print(f"Client exception for {c['addr']}: {e}", flush=True)
+            traceback.print_exc()
+            if c["alive"]:
+                self._drop_client(c)
+
+    def _on_accept(self, fd):
+        client_sock = socket.socket(fileno=fd)
+        self._tune_client_socket(client_sock)
+        try:
+            client_addr = client_sock.getpeername()
+        except OSError:
+            client_addr = None
+        print(f"New connection from {client_addr}", flush=True)
+        if not self._free_mask:
+            # refuse extra clients politely
+            try:
+                client_sock.sendall(dumps_line({"type": "error", "message": "Server full"}))
+            except OSError:
+                pass
+            client_sock.close()
+            print(f"Refused connection from {client_addr}: server full", flush=True)
+            return
+
+        pid = self._next_player_id()
+        liburing.io_uring_register_files_update(self.ring, liburing.FileIndex([fd]), pid)
+        client_info = {
+            "sock": client_sock,
+            "addr": client_addr,
+            "player_id": pid,
+            "alive": True,
+            "conn_id": self._next_conn_id,
+            "inbuf": bytearray(),
+            "outq": [],
+            "sending": False,
+            "send_since": 0.0,
+            "inflight": 0,
+        }
+        self._next_conn_id += 1
+        self._conns[client_info["conn_id"]] = client_info
+        self.clients.append(client_info)
+        print(f"Starting client for player {pid} from {client_addr}", flush=True)
+
+        # Send init message with assigned player id, then the current state
+        self._queue_send(client_info, dumps_line({"type": "init", "player_id": pid}))
+        self._broadcast_state()
+        self._arm_recv(client_info)
+
+    def _on_recv(self, c, res):
+        if res <= 0:
+            if res < 0:
+                print(f"Receive failed for {c['addr']}: {os.strerror(-res)}", flush=True)
+            self._drop_client(c)
+            return
+
+        pid = c["player_id"]
+        buffer = c["inbuf"]
+        buffer.extend(memoryview(self.recv_bufs[pid])[:res])
+        while (nl := buffer.find(b"\n")) != -1:
+            line = buffer[:nl].strip()
+            del buffer[:nl + 1]
+            if not line:
+                continue
+            try:
+                message = loads(line)
+            except Exception as e:
+                print(f"Malformed JSON from {c['addr']}: {e}", flush=True)
+                continue
+            move = self._parse_move(message)
+            if move is not None and self._apply_move(pid, *move):
+                self._broadcast_state()
+        if c["alive"]:
+            self._arm_recv(c)
+
+    def _queue_send(self, c, data):
+        # One send in flight per client keeps lines in order on the socket
+        c["outq"].append(data)
+        if not c["sending"]:
+            self._arm_send(c)
+
+    def _on_send(self, c, res):
+        if res < 0:
+            self._drop_client(c)
+            return
+        outq = c["outq"]
+        if res < len(outq[0]):
+            # Partial send; resubmit the remainder
+            outq[0] = outq[0][res:]
+        else:
+            outq.pop(0)
+        if outq:
+            self._arm_send(c)
+        else:
+            c["sending"] = False
+
+    def _send_stalled(self, c):
+        """True if c has stopped reading: its send has been in flight for
+           SEND_TIMEOUT or its queue has grown past OUTQ_LIMIT."""
+        if not c["sending"]:
+            return False
+        return (time.monotonic() - c["send_since"] > self.SEND_TIMEOUT
+                or sum(map(len, c["outq"])) > self.OUTQ_LIMIT)
+
+    def _broadcast_state(self):
+        data = self._state_bytes()
+        stalled = []
+        for c in self.clients:
+            if not c["alive"]:
+                continue
+            if self._send_stalled(c):
+                stalled.append(c)
+            else:
+                self._queue_send(c, data)
+        # Dropped after the loop: each drop broadcasts the new state itself
+        for c in stalled:
+            if c["alive"]:
+                self._drop_client(c)
+
+    def _drop_client(self, c):
+        print(f"Client {c['addr']} disconnected (player {c['player_id']})", flush=True)
+        c["alive"] = False
+        if c["inflight"] == 0:
+            del self._conns[c["conn_id"]]
+        # shutdown() completes any in-flight read/send on the socket
+        try:
+            c["sock"].shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        liburing.io_uring_register_files_update(self.ring, liburing.FileIndex([-1]), c["player_id"])
+        c["sock"].close()
+        self.clients = [x for x in self.clients if x is not c]
+        self._release_player_id(c["player_id"])
+        self._broadcast_state()
+
+
 if __name__ == "__main__":
     # Render-specific: Get host/port from environment
     host = os.environ.get('HOST', '0.0.0.0')
@@ -297,5 +958,28 @@ if __name__ == "__main__":
         # For local development
         port = int(sys.argv[1]) if len(sys.argv) > 1 else 5555
 
-    server = TicTacToe3DServer(host, port)
+    # USE_IOURING=1 selects the io_uring server (Linux with liburing only),
+    # USE_ASYNCIO=1 the single-threaded event-loop server
+    use_iouring = os.environ.get('USE_IOURING') == '1'
+    if use_iouring and (liburing is None or not sys.platform.startswith('linux')):
+        print("USE_IOURING=1 but io_uring is unavailable; using threaded server", flush=True)
+        use_iouring = False
+    elif use_iouring:
+        # The package may be present while the kernel can't provide the ring
+        error = IoUringTicTacToe3DServer.probe()
+        if error is not None:
+            print(f"USE_IOURING=1 but io_uring setup failed ({error}); using threaded server", flush=True)
+            use_iouring = False
+
+    if use_iouring:
+        server = IoUringTicTacToe3DServer(host, port)
+    elif os.environ.get('USE_ASYNCIO') == '1':
+        server = AsyncTicTacToe3DServer(host, port)
+    else:
+        # ACCEPT_LISTENERS=N runs N accept threads on SO_REUSEPORT listeners
+        # (0 = one per CPU)
+        # PIN_THREADS=1 pins accept and client threads to CPUs
+        listeners = int(os.environ.get('ACCEPT_LISTENERS', 1))
+        pin_threads = os.environ.get('PIN_THREADS') == '1'
+        server = TicTacToe3DServer(host, port, accept_listeners=listeners, pin_threads=pin_threads)
     server.run()
\ No newline at end of file